@@ -1,4 +1,8 @@
 """Sorting ints in a file using a bit array."""
+import os
+import struct
+import tempfile
+import zlib
 from collections.abc import Iterable
 
 # Suppose you must sort and output sorted integer obtained from a file
@@ -20,6 +24,22 @@ from collections.abc import Iterable
 # 	Considering this is supposed to be a solution for a system low in memory, a
 # 	BitArray class is perhaps a luxury, so the implementation uses simple
 # 	functions.
+#
+# 	If the input file is an append-only log, rebuilding the bit array from the
+# 	whole file for every query is wasteful. Pass a snapshot_name to
+# 	bit_array_sort or bit_array_get_missing to keep the bit array on disk,
+# 	together with the range, a checksum and the number of bytes of the input
+# 	file already consumed. The next call only reads the lines appended since.
+
+# Snapshot layout (little-endian): magic, format version, range start, range
+# stop, byte offset of input consumed, crc32 of the last (at most)
+# _FINGERPRINT_SIZE bytes of input consumed, crc32 of the bit array, followed
+# by the bit array itself. The input fingerprint detects a rotated or
+# rewritten input file, which would otherwise silently give wrong results.
+_SNAPSHOT_MAGIC = b"BASN"
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_HEADER = struct.Struct("<4sHqqQII")
+_FINGERPRINT_SIZE = 4096
 
 
 def set_bit(bit_array: bytearray, offset: int) -> None:
@@ -54,6 +74,38 @@ def bit_array_get(bit_array: bytearray, start: int, stop: int,
 			yield start + bit_nr
 
 
+def _set_value_bit(bit_array: bytearray, start: int, stop: int,
+                   int_str: bytes) -> None:
+	"""Set the bit for the int in int_str. Raises ValueError if int_str is not
+	an int in range(start, stop)."""
+	
+	value = int(int_str)
+	if value < start or value >= stop:
+		raise ValueError(f"Illegal value {value} "
+		                 f"(must be in range({start}, {stop}))")
+	set_bit(bit_array, value - start)
+
+
+def _ingest_from_offset(bit_array: bytearray, start: int, stop: int,
+                        filename: str, offset: int) -> tuple[int, bytes]:
+	"""Set bits in bit_array for all complete lines in filename from byte
+	offset on. Return the offset just after the last complete line and the
+	trailing line without newline (possibly still being written), which is
+	NOT applied to bit_array."""
+	
+	tail = b""
+	with open(filename, "rb") as data_file:
+		data_file.seek(offset)
+		for s in data_file:
+			if not s.endswith(b"\n"):
+				tail = s
+				break
+			offset += len(s)
+			_set_value_bit(bit_array, start, stop, s)
+	
+	return offset, tail
+
+
 def _init_bit_array_from_file(start: int, stop: int, filename: str) \
 	-> bytearray:
 	"""Initialize and return a bytearray with all bits set at offsets that are
@@ -61,28 +113,142 @@ def _init_bit_array_from_file(start: int, stop: int, filename: str) \
 	
 	bit_array = bytearray((stop - start + 7) // 8)  # zero-filled by default
 	
-	with open(filename) as data_file:
-		for s in data_file:
-			value = int(s)
-			if value < start or value >= stop:
-				raise ValueError(f"Illegal value {value} "
-				                 f"(must be in range({start}, {stop}))")
-			set_bit(bit_array, value - start)
+	_, tail = _ingest_from_offset(bit_array, start, stop, filename, 0)
+	if tail:
+		_set_value_bit(bit_array, start, stop, tail)
 	
 	return bit_array
 
 
-def bit_array_get_missing(start: int, stop: int, filename: str) \
-	-> Iterable[int]:
-	"""Return generator that yields sorted ints that are NOT in filename."""
+def _input_fingerprint(filename: str, offset: int) -> int:
+	"""Return crc32 of the last (at most) _FINGERPRINT_SIZE bytes of filename
+	before byte offset."""
+	
+	with open(filename, "rb") as data_file:
+		block_start = max(0, offset - _FINGERPRINT_SIZE)
+		data_file.seek(block_start)
+		return zlib.crc32(data_file.read(offset - block_start))
+
 
-	bit_array = _init_bit_array_from_file(start, stop, filename)
+def save_snapshot(snapshot_name: str, bit_array: bytearray, start: int,
+                  stop: int, offset: int, fingerprint: int) -> None:
+	"""Write bit_array for range(start, stop), with offset bytes of input
+	(with input fingerprint) consumed, to snapshot_name. The file is replaced
+	atomically."""
+	
+	header = _SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, start,
+	                               stop, offset, fingerprint,
+	                               zlib.crc32(bit_array))
+	# A unique temp file in the same directory (so os.replace is atomic) keeps
+	# concurrent writers apart; fsync makes sure it is complete on disk
+	# before it replaces the old snapshot.
+	snapshot_path = os.path.abspath(snapshot_name)
+	with tempfile.NamedTemporaryFile(
+		dir=os.path.dirname(snapshot_path),
+		prefix=os.path.basename(snapshot_path) + ".", suffix=".tmp",
+		delete=False) as f:
+		try:
+			f.write(header)
+			f.write(bit_array)
+			f.flush()
+			os.fsync(f.fileno())
+		except BaseException:
+			f.close()
+			os.remove(f.name)
+			raise
+	os.replace(f.name, snapshot_name)
+
+
+def load_snapshot(snapshot_name: str) \
+	-> tuple[bytearray, int, int, int, int]:
+	"""Return (bit_array, start, stop, offset, fingerprint) read from
+	snapshot_name. Raises ValueError if the snapshot is not valid."""
+	
+	with open(snapshot_name, "rb") as f:
+		header = f.read(_SNAPSHOT_HEADER.size)
+		bit_array = bytearray(f.read())
+	
+	if len(header) != _SNAPSHOT_HEADER.size:
+		raise ValueError(f"Snapshot {snapshot_name} is truncated")
+	magic, version, start, stop, offset, fingerprint, checksum = \
+		_SNAPSHOT_HEADER.unpack(header)
+	if magic != _SNAPSHOT_MAGIC:
+		raise ValueError(f"{snapshot_name} is not a bit array snapshot")
+	if version != _SNAPSHOT_VERSION:
+		raise ValueError(f"Unsupported snapshot version {version} "
+		                 f"(expected {_SNAPSHOT_VERSION})")
+	if len(bit_array) != (stop - start + 7) // 8 \
+		or zlib.crc32(bit_array) != checksum:
+		raise ValueError(f"Snapshot {snapshot_name} is corrupt")
+	
+	return bit_array, start, stop, offset, fingerprint
+
+
+def _init_bit_array_from_snapshot(start: int, stop: int, filename: str,
+                                  snapshot_name: str) -> bytearray:
+	"""Load the bit array from snapshot_name (or start with an empty one if
+	it does not exist yet), ingest the lines appended to filename since the
+	snapshot was taken, save the updated snapshot and return the bit array.
+	A trailing line without newline is applied to the returned bit array but
+	not to the snapshot, so it is read again on the next call."""
+	
+	if os.path.exists(snapshot_name):
+		bit_array, snap_start, snap_stop, offset, fingerprint = \
+			load_snapshot(snapshot_name)
+		if (snap_start, snap_stop) != (start, stop):
+			raise ValueError(f"Snapshot {snapshot_name} is for "
+			                 f"range({snap_start}, {snap_stop}), not "
+			                 f"range({start}, {stop})")
+		if os.path.getsize(filename) < offset:
+			raise ValueError(f"File {filename} is shorter than the "
+			                 f"{offset} bytes already consumed")
+		if _input_fingerprint(filename, offset) != fingerprint:
+			raise ValueError(f"File {filename} does not match snapshot "
+			                 f"{snapshot_name} (was it rotated or rewritten?)")
+	else:
+		bit_array, offset = bytearray((stop - start + 7) // 8), 0
+	
+	new_offset, tail = _ingest_from_offset(bit_array, start, stop, filename,
+	                                       offset)
+	if new_offset != offset or not os.path.exists(snapshot_name):
+		save_snapshot(snapshot_name, bit_array, start, stop, new_offset,
+		              _input_fingerprint(filename, new_offset))
+	if tail:
+		_set_value_bit(bit_array, start, stop, tail)
+	
+	return bit_array
+
+
+def _init_bit_array(start: int, stop: int, filename: str,
+                    snapshot_name: str | None) -> bytearray:
+	"""Return the bit array for filename, built from scratch if snapshot_name
+	is None, else incrementally from the snapshot."""
+	
+	if snapshot_name is None:
+		return _init_bit_array_from_file(start, stop, filename)
+	return _init_bit_array_from_snapshot(start, stop, filename, snapshot_name)
+
+
+def bit_array_get_missing(start: int, stop: int, filename: str,
+                          snapshot_name: str | None = None) \
+	-> Iterable[int]:
+	"""Return generator that yields sorted ints that are NOT in filename. If
+	snapshot_name is given, the bit array is loaded from (and saved to) that
+	snapshot, so only lines appended to filename since are read. A last line
+	without newline counts in the result either way, but is not recorded in
+	the snapshot (it may still be being written), so it is read again on the
+	next call."""
+
+	bit_array = _init_bit_array(start, stop, filename, snapshot_name)
 	yield from bit_array_get(bit_array, start, stop, False)
 
 
-def bit_array_sort(start: int, stop: int, filename: str) -> Iterable[int]:
+def bit_array_sort(start: int, stop: int, filename: str,
+                   snapshot_name: str | None = None) -> Iterable[int]:
 	"""Return a generator that yields sorted integers from data_file. The
-	integers in the file must all be in range(start, stop)."""
+	integers in the file must all be in range(start, stop). If snapshot_name
+	is given, the bit array is loaded from (and saved to) that snapshot, with
+	a last line without newline handled as in bit_array_get_missing."""
 	
-	bit_array = _init_bit_array_from_file(start, stop, filename)
+	bit_array = _init_bit_array(start, stop, filename, snapshot_name)
 	yield from bit_array_get(bit_array, start, stop)
@@ -1,6 +1,9 @@
 """Finding one (or all) missing ints in a list of bounded integers."""
 import operator
-from os import remove
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from os import cpu_count, remove
+from os.path import getsize
 from random import choice
 from string import ascii_lowercase
 
@@ -108,3 +111,74 @@ def find_missing_high_memory(filename: str, max_bit_offset: int) -> int:
 		list_of_ints = [int(i) for i in f]
 
 	return _find_missing_2(list_of_ints, max_bit_offset)
+
+
+def _count_prefixes(filename: str, byte_start: int, byte_stop: int,
+                    known_prefix: int, shift: int, prefix_bits: int) \
+	-> list[int]:
+	"""Return histogram (of length 2 ** prefix_bits) of the prefix_bits bits
+	above bit offset shift of all ints whose higher bits equal known_prefix,
+	for all lines in filename that start in [byte_start, byte_stop)."""
+	
+	counts = [0] * (1 << prefix_bits)
+	mask = (1 << prefix_bits) - 1
+	with open(filename, "rb") as input_tape:
+		if byte_start > 0:
+			# Skip the line that started in the previous byte range.
+			input_tape.seek(byte_start - 1)
+			input_tape.readline()
+		position = input_tape.tell()
+		while position < byte_stop:
+			int_str = input_tape.readline()
+			if not int_str:
+				break
+			position += len(int_str)
+			value = int(int_str)
+			if value >> (shift + prefix_bits) == known_prefix:
+				counts[(value >> shift) & mask] += 1
+	return counts
+
+
+def find_missing_parallel(filename: str, max_bit_offset: int,
+                          prefix_bits: int = 8,
+                          nr_workers: int | None = None) -> int:
+	"""Same contract as find_missing_low_memory, but instead of deciding one
+	bit per pass, each pass counts the ints per value of the next prefix_bits
+	bits (in parallel over byte ranges of the file) and continues in the least
+	populated bucket, so only (max_bit_offset + prefix_bits) // prefix_bits
+	passes are needed. Raises ValueError if no int is missing, or if
+	prefix_bits < 1 or max_bit_offset < 0."""
+	
+	if prefix_bits < 1:
+		raise ValueError(f"prefix_bits must be at least 1 (got {prefix_bits})")
+	if max_bit_offset < 0:
+		raise ValueError(f"max_bit_offset must be at least 0 "
+		                 f"(got {max_bit_offset})")
+	
+	nr_workers = nr_workers or cpu_count() or 1
+	file_size = getsize(filename)
+	chunk_size = -(-file_size // nr_workers)
+	starts = range(0, file_size, max(chunk_size, 1))
+	stops = [min(start + chunk_size, file_size) for start in starts]
+	
+	total_bits = max_bit_offset + 1
+	known_prefix, known_bits = 0, 0
+	with ProcessPoolExecutor(nr_workers) as executor:
+		while known_bits < total_bits:
+			nr_bits = min(prefix_bits, total_bits - known_bits)
+			shift = total_bits - known_bits - nr_bits
+			counts = [0] * (1 << nr_bits)
+			for chunk_counts in executor.map(
+				_count_prefixes, repeat(filename), starts, stops,
+				repeat(known_prefix), repeat(shift), repeat(nr_bits)):
+				counts = [a + b for a, b in zip(counts, chunk_counts)]
+			
+			# If the ints are unique, the least populated bucket has fewer
+			# ints than it has values, so it must contain a missing int.
+			bucket = min(range(len(counts)), key=counts.__getitem__)
+			known_prefix = (known_prefix << nr_bits) | bucket
+			known_bits += nr_bits
+			if counts[bucket] == 0:
+				return known_prefix << shift
+	
+	raise ValueError(f"No missing int in range(0, {1 << total_bits})")
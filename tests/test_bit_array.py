@@ -1,7 +1,10 @@
 """Tests for function in bit_array.py"""
+from pathlib import Path
 from random import sample
 
-from bit_array import bit_array_sort, bit_array_get_missing
+import pytest
+
+from bit_array import bit_array_sort, bit_array_get_missing, load_snapshot
 
 
 def write_ints(start: int, stop: int, nr_ints: int, filename: str) -> None:
@@ -52,3 +55,80 @@ def test_bit_array_find_missing() -> None:
 	assert set_sorted_missing.union(set_from_file) == set_all
 	assert set_sorted_missing.intersection(set_from_file) == set()
 	print("Bitarray get missing integers OK!")
+
+
+def test_bit_array_snapshot(tmp_path: Path) -> None:
+	"""Test that a snapshot only ingests lines appended to the input file."""
+	
+	filename = str(tmp_path / "log.ints")
+	snapshot_name = str(tmp_path / "log.snapshot")
+	range_start = 1000
+	range_stop = 3000
+	values = sample(range(range_start, range_stop), 1500)
+	
+	with open(filename, "w") as f:
+		f.writelines(f"{i}\n" for i in values[:1000])
+	b_sorted = list(bit_array_sort(range_start, range_stop, filename,
+	                               snapshot_name))
+	assert b_sorted == sorted(values[:1000])
+	assert load_snapshot(snapshot_name)[3] == Path(filename).stat().st_size
+	
+	# Append some lines and an unterminated one, which counts in the result
+	# but is not recorded in the snapshot yet.
+	with open(filename, "a") as f:
+		f.writelines(f"{i}\n" for i in values[1000:-1])
+		f.write(str(values[-1]))
+	b_sorted = list(bit_array_sort(range_start, range_stop, filename,
+	                               snapshot_name))
+	assert b_sorted == sorted(values)
+	assert b_sorted == list(bit_array_sort(range_start, range_stop, filename))
+	assert load_snapshot(snapshot_name)[3] == \
+	       Path(filename).stat().st_size - len(str(values[-1]))
+	
+	with open(filename, "a") as f:
+		f.write("\n")
+	missing = list(bit_array_get_missing(range_start, range_stop, filename,
+	                                     snapshot_name))
+	assert missing == sorted(set(range(range_start, range_stop)) - set(values))
+	assert load_snapshot(snapshot_name)[3] == Path(filename).stat().st_size
+	
+	with pytest.raises(ValueError):
+		list(bit_array_sort(range_start, range_stop + 1, filename,
+		                    snapshot_name))
+	
+	with open(snapshot_name, "r+b") as f:
+		f.seek(-1, 2)
+		last_byte = f.read(1)
+		f.seek(-1, 2)
+		f.write(b"\x00" if last_byte == b"\xff" else b"\xff")
+	with pytest.raises(ValueError):
+		list(bit_array_sort(range_start, range_stop, filename, snapshot_name))
+
+
+def test_bit_array_blank_line(tmp_path: Path) -> None:
+	"""Test that a blank line is rejected with and without a snapshot."""
+	
+	filename = str(tmp_path / "blank.ints")
+	with open(filename, "w") as f:
+		f.write("3\n\n1\n")
+	
+	with pytest.raises(ValueError):
+		list(bit_array_sort(0, 10, filename))
+	with pytest.raises(ValueError):
+		list(bit_array_sort(0, 10, filename, str(tmp_path / "blank.snap")))
+
+
+def test_bit_array_snapshot_replaced_input(tmp_path: Path) -> None:
+	"""Test that a snapshot is rejected if the input file was replaced."""
+	
+	filename = str(tmp_path / "log.ints")
+	snapshot_name = str(tmp_path / "log.snapshot")
+	with open(filename, "w") as f:
+		f.write("3\n1\n2")
+	assert list(bit_array_sort(0, 10, filename, snapshot_name)) == [1, 2, 3]
+	
+	# Same or larger size, so only the fingerprint can tell.
+	with open(filename, "w") as f:
+		f.write("7\n8\n9\n")
+	with pytest.raises(ValueError):
+		list(bit_array_sort(0, 10, filename, snapshot_name))
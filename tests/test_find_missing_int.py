@@ -1,7 +1,11 @@
 """Tests the split_list and split_file functions"""
+from pathlib import Path
 from random import sample
 
-from find_missing_ints import find_missing_low_memory, find_missing_high_memory
+import pytest
+
+from find_missing_ints import find_missing_low_memory, \
+	find_missing_high_memory, find_missing_parallel
 
 
 def test_find_missing_low_memory() -> None:
@@ -16,6 +20,31 @@ def test_find_missing_high_memory() -> None:
 	assert missing == 595233
 
 
+def test_find_missing_parallel(tmp_path: Path) -> None:
+	filename = str(tmp_path / "_16bitints.txt")
+	write_ints(0, 2 ** 16, 60_000, filename)
+	with open(filename) as f:
+		from_file = set(int(i) for i in f)
+	
+	for prefix_bits in (1, 5, 8, 16):
+		missing = find_missing_parallel(filename, 15, prefix_bits, 3)
+		assert 0 <= missing < 2 ** 16
+		assert missing not in from_file
+	
+	# Only one int is missing, so all variants must find the same one.
+	write_ints(0, 2 ** 10, 2 ** 10 - 1, filename)
+	expected = find_missing_high_memory(filename, 9)
+	assert find_missing_parallel(filename, 9, 4, 4) == expected
+	
+	write_ints(0, 2 ** 10, 2 ** 10, filename)
+	with pytest.raises(ValueError):
+		find_missing_parallel(filename, 9, 4, 4)
+	
+	for prefix_bits, max_bit_offset in ((0, 9), (-1, 9), (4, -1)):
+		with pytest.raises(ValueError):
+			find_missing_parallel(filename, max_bit_offset, prefix_bits, 4)
+
+
 # Support function, only required to generate input files (should not be done
 # without changing the expected value for 'missing' in tests above!!!!)
 def write_ints(start: int, stop: int, nr_ints: int, filename: str) -> None: